@@ -1,5 +1,7 @@
 APP_NAME = "ProductivityTracker"
 APP_VERSION = "2.0.0"
+# AppUserModelID native toasts are sent under; registered under HKCU on first use
+TOAST_APP_ID = f"Baap.{APP_NAME}"
 
 
 # Environments
@@ -15,7 +15,7 @@ from config import (
 )
 from utils.active_window import get_active_window_title
 from utils.screen_capture import capture_screenshot
-from utils.webcam_capture import capture_webcam_photo
+from utils.webcam_capture import capture_webcam_photo, close_webcam
 from utils.browser_tabs import collect_browser_tabs
 from utils.logger import logger
 from utils.excel_storage import (
@@ -890,6 +890,7 @@ class SessionManager:
     def _stop_background_tasks(self):
         self._bg_running = False
         # Threads are daemons; they will exit naturally on flag
+        close_webcam()
 
     def get_latest_worklog_info(self):
         with self._worklog_lock:
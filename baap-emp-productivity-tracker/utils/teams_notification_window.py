@@ -4,15 +4,74 @@ Creates a notification that looks exactly like Microsoft Teams notifications
 """
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
 import threading
 import time
+import queue
 import logging
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageTk as _ImageTk
 import io
 import base64
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_AVATAR_RGB = (0x62, 0x64, 0xA7)  # Teams purple
+
+@lru_cache(maxsize=256)
+def _compute_initials(name: str) -> str:
+    """Return the avatar initials for a sender name"""
+    # Get first letter of first name and first letter of last name
+    parts = name.split()
+    if len(parts) >= 2:
+        return (parts[0][0] + parts[-1][0]).upper()
+    return name[0:2].upper()
+
+@lru_cache(maxsize=8)
+def _get_avatar_font(font_size: int):
+    """Load the avatar font once per size"""
+    try:
+        # Try to use a nice font
+        return ImageFont.truetype("arial.ttf", font_size)
+    except Exception:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=8)
+def _circle_mask(size: int):
+    """Boolean mask of the avatar disc for a given size"""
+    y, x = np.ogrid[:size, :size]
+    r = (size - 1) / 2
+    return (x - r) ** 2 + (y - r) ** 2 <= r ** 2
+
+@lru_cache(maxsize=256)
+def _glyph_coverage(initials: str, size: int):
+    """Rasterize initials once into a centred 0-255 coverage array"""
+    img = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(img)
+    font = _get_avatar_font(size // 2)
+    bbox = draw.textbbox((0, 0), initials, font=font)
+    x = (size - (bbox[2] - bbox[0])) // 2
+    y = (size - (bbox[3] - bbox[1])) // 2
+    draw.text((x, y), initials, fill=255, font=font)
+    return np.asarray(img, dtype=np.uint16)
+
+@lru_cache(maxsize=256)
+def _avatar_ppm(initials: str, size: int) -> bytes:
+    """Build the avatar as binary PPM data that tk.PhotoImage can load directly"""
+    pixels = np.full((size, size, 3), _AVATAR_RGB, np.uint16)
+    # The disc is the same purple as the card, so the mask only clips the glyph
+    coverage = _glyph_coverage(initials, size) * _circle_mask(size)
+    pixels += (255 - pixels) * coverage[..., None] // 255
+    header = f'P6 {size} {size} 255\n'.encode('ascii')
+    return header + pixels.astype(np.uint8).tobytes()
+
 class TeamsNotificationWindow:
     """Custom Teams-style notification window"""
     
@@ -20,18 +79,26 @@ class TeamsNotificationWindow:
         self.sender = sender
         self.message = message
         self.duration = duration
+        self._initials = _compute_initials(sender)
         self.window = None
         self.closed = False
+        self.message_count = 1
+        self._x = 0
+        self._alpha = 0.0
+        self._shown_at = 0.0
+        self._close_job = None
+        self._canvas = None
+        self._message_item = None
+        self._avatar_img = None
         
-    def _create_avatar_image(self, name: str, size: int = 48):
+    def _create_avatar_image(self, size: int = 48):
         """Create a circular avatar with initials"""
         try:
-            # Get first letter of first name and first letter of last name
-            parts = name.split()
-            if len(parts) >= 2:
-                initials = (parts[0][0] + parts[-1][0]).upper()
-            else:
-                initials = name[0:2].upper() if len(name) >= 2 else name[0].upper()
+            initials = self._initials
+            
+            if NUMPY_AVAILABLE:
+                # Fast path: cached raw pixel buffer handed straight to Tk
+                return tk.PhotoImage(master=self.window, data=_avatar_ppm(initials, size), format='PPM')
             
             # Create image with Teams purple background
             img = Image.new('RGB', (size, size), color='#6264A7')
@@ -41,12 +108,7 @@ class TeamsNotificationWindow:
             draw.ellipse([0, 0, size-1, size-1], fill='#6264A7')
             
             # Draw text (initials)
-            try:
-                # Try to use a nice font
-                font_size = size // 2
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                font = ImageFont.load_default()
+            font = _get_avatar_font(size // 2)
             
             # Calculate text position (center)
             bbox = draw.textbbox((0, 0), initials, font=font)
@@ -58,14 +120,12 @@ class TeamsNotificationWindow:
             draw.text((x, y), initials, fill='white', font=font)
             
             # Convert to PhotoImage
-            from PIL import ImageTk
-            return ImageTk.PhotoImage(img)
+            return _ImageTk.PhotoImage(img)
         except Exception as e:
             logger.debug(f"Error creating avatar: {e}")
             # Return a simple colored circle
             img = Image.new('RGB', (size, size), color='#6264A7')
-            from PIL import ImageTk
-            return ImageTk.PhotoImage(img)
+            return _ImageTk.PhotoImage(img)
     
     def show(self, root=None):
         """Show the notification window"""
@@ -80,151 +140,79 @@ class TeamsNotificationWindow:
             self.window = tk.Toplevel(root)
             self.window.overrideredirect(True)  # Remove window decorations
             self.window.attributes('-topmost', True)  # Always on top
-            self.window.attributes('-alpha', 0.95)  # Slight transparency
+            self.window.attributes('-alpha', 0.0)  # Faded in by _fade_in
             
             # Teams purple background color
             teams_purple = '#6264A7'
             teams_dark = '#464EB8'
             
             # Set window size
-            width = 360
-            height = 120
+            width = _NOTIFICATION_WIDTH
+            height = _NOTIFICATION_HEIGHT
             self.window.geometry(f'{width}x{height}')
             
             # Position in top-right corner, stack multiple notifications
-            screen_width = self.window.winfo_screenwidth()
-            screen_height = self.window.winfo_screenheight()
+            screen_width, screen_height = _get_screen_dims(root)
             x = screen_width - width - 20
+            self._x = x
             
             # Stack notifications vertically (each new one appears below previous)
-            global _active_notifications
-            active_count = len([n for n in _active_notifications if not n.closed and n.window])
-            y = 20 + (active_count * (height + 10))  # Stack with 10px gap
+            y = _stack_y(_ACTIVE_COUNT)
             
             self.window.geometry(f'{width}x{height}+{x}+{y}')
             
-            # Main container
-            container = tk.Frame(self.window, bg=teams_purple, padx=0, pady=0)
-            container.pack(fill=tk.BOTH, expand=True)
-            
-            # Header
-            header = tk.Frame(container, bg=teams_purple, height=32)
-            header.pack(fill=tk.X, padx=12, pady=(8, 0))
-            
-            # Microsoft Teams logo and text
-            logo_frame = tk.Frame(header, bg=teams_purple)
-            logo_frame.pack(side=tk.LEFT)
-            
-            # Teams logo (simple "TT" text for now)
-            logo_label = tk.Label(
-                logo_frame,
-                text="TT",
+            # The whole card is drawn on a single canvas
+            canvas = tk.Canvas(
+                self.window,
+                width=width,
+                height=height,
                 bg=teams_purple,
-                fg='white',
-                font=('Segoe UI', 10, 'bold')
+                highlightthickness=0,
+                cursor='hand2'
             )
-            logo_label.pack(side=tk.LEFT, padx=(0, 6))
+            canvas.pack(fill=tk.BOTH, expand=True)
+            self._canvas = canvas
             
-            teams_label = tk.Label(
-                logo_frame,
-                text="Microsoft Teams",
-                bg=teams_purple,
-                fg='white',
-                font=('Segoe UI', 10)
-            )
-            teams_label.pack(side=tk.LEFT)
+            # Header: Teams logo (simple "TT" text for now) and title
+            canvas.create_text(12, 20, text="TT", fill='white',
+                               font=('Segoe UI', 10, 'bold'), anchor='w')
+            canvas.create_text(36, 20, text="Microsoft Teams", fill='white',
+                               font=('Segoe UI', 10), anchor='w')
             
             # Header buttons (options and close)
-            buttons_frame = tk.Frame(header, bg=teams_purple)
-            buttons_frame.pack(side=tk.RIGHT)
-            
-            # Options button (three dots)
-            options_btn = tk.Label(
-                buttons_frame,
-                text="⋯",
-                bg=teams_purple,
-                fg='white',
-                font=('Segoe UI', 14),
-                cursor='hand2',
-                padx=4
-            )
-            options_btn.pack(side=tk.LEFT)
-            
-            # Close button
-            close_btn = tk.Label(
-                buttons_frame,
-                text="✕",
-                bg=teams_purple,
-                fg='white',
-                font=('Segoe UI', 12, 'bold'),
-                cursor='hand2',
-                padx=4
-            )
-            close_btn.pack(side=tk.LEFT)
-            close_btn.bind('<Button-1>', lambda e: self.close())
-            
-            # Content area
-            content = tk.Frame(container, bg=teams_purple)
-            content.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+            canvas.create_text(width - 40, 20, text="⋯", fill='white',
+                               font=('Segoe UI', 14), tags='options')
+            canvas.create_text(width - 18, 20, text="✕", fill='white',
+                               font=('Segoe UI', 12, 'bold'), tags='close')
             
             # Avatar
-            avatar_img = self._create_avatar_image(self.sender)
-            avatar_label = tk.Label(
-                content,
-                image=avatar_img,
-                bg=teams_purple
-            )
-            avatar_label.image = avatar_img  # Keep a reference
-            avatar_label.pack(side=tk.LEFT, padx=(0, 12))
-            
-            # Message content
-            message_frame = tk.Frame(content, bg=teams_purple)
-            message_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            avatar_img = self._create_avatar_image()
+            self._avatar_img = avatar_img  # Keep a reference
+            canvas.create_image(36, 74, image=avatar_img)
             
             # Sender name
-            sender_label = tk.Label(
-                message_frame,
-                text=self.sender,
-                bg=teams_purple,
-                fg='white',
-                font=('Segoe UI', 12, 'bold'),
-                anchor='w'
-            )
-            sender_label.pack(fill=tk.X, pady=(0, 4))
+            canvas.create_text(72, 54, text=self.sender, fill='white',
+                               font=('Segoe UI', 12, 'bold'), anchor='w')
             
             # Message preview
             # Truncate message if too long
-            display_message = self.message
-            if len(display_message) > 60:
-                display_message = display_message[:57] + "..."
-            
-            message_label = tk.Label(
-                message_frame,
+            display_message = _truncate_message(self.message)
+            self._message_item = canvas.create_text(
+                72, 66,
                 text=display_message,
-                bg=teams_purple,
-                fg='#EFEFEF',  # Light gray/white color (tkinter doesn't support rgba)
-                font=('Segoe UI', 11),
-                anchor='w',
-                wraplength=240,
+                fill='#EFEFEF',  # Light gray/white color (tkinter doesn't support rgba)
+                font=_MESSAGE_FONT,
+                anchor='nw',
+                width=_message_wraplength(root, display_message),
                 justify='left'
             )
-            message_label.pack(fill=tk.X)
             
             # Make window clickable to open Teams
-            def on_click(event):
-                try:
-                    from utils.teams_notifications import open_teams_chat_by_identifier
-                    open_teams_chat_by_identifier(self.sender)
-                except Exception as e:
-                    logger.debug(f"Error opening Teams chat: {e}")
-                self.close()
-            
-            container.bind('<Button-1>', on_click)
-            for widget in [content, message_frame, sender_label, message_label, avatar_label]:
-                widget.bind('<Button-1>', on_click)
+            canvas.bind('<Button-1>', self._on_click)
             
             # Auto-close after duration
-            self.window.after(self.duration * 1000, self.close)
+            self._close_job = self.window.after(self.duration * 1000, self.close)
+            self._shown_at = time.monotonic()
             
             # Fade in animation
             self._fade_in()
@@ -232,67 +220,114 @@ class TeamsNotificationWindow:
         except Exception as e:
             logger.error(f"Error showing Teams notification: {e}")
     
+    def _on_click(self, event):
+        """Close on the close button, otherwise open the sender's chat"""
+        tags = self._canvas.gettags('current')
+        if 'options' in tags:
+            return
+        if 'close' not in tags:
+            open_chat = _get_open_teams_chat()
+            if open_chat is not None:
+                try:
+                    open_chat(self.sender)
+                except Exception as e:
+                    logger.debug(f"Error opening Teams chat: {e}")
+        self.close()
+    
+    def append_message(self, message: str):
+        """Fold another message from the same sender into this notification"""
+        self.message_count += 1
+        self.message = message
+        try:
+            display_message = _truncate_message(f"{self.message_count} new messages: {message}")
+            self._canvas.itemconfigure(
+                self._message_item,
+                text=display_message,
+                width=_message_wraplength(self.window, display_message)
+            )
+            # Restart the auto-close timer so the burst stays readable
+            if self._close_job is not None:
+                self.window.after_cancel(self._close_job)
+            self._close_job = self.window.after(self.duration * 1000, self.close)
+        except Exception as e:
+            logger.debug(f"Error appending to notification: {e}")
+    
     def _fade_in(self):
         """Fade in animation"""
-        try:
-            alpha = 0.0
-            step = 0.05
-            def animate():
-                nonlocal alpha
-                if alpha < 0.95 and not self.closed:
-                    alpha += step
-                    self.window.attributes('-alpha', alpha)
-                    self.window.after(20, animate)
-            animate()
-        except Exception:
-            pass
+        _start_animation(self, _FADE_IN, 0)
     
     def close(self):
         """Close the notification window"""
         if self.closed:
             return
         self.closed = True
+        # Remove from active notifications and close the gap it leaves
+        global _active_notifications, _ACTIVE_COUNT
+        if self in _active_notifications:
+            _active_notifications.remove(self)
+            _ACTIVE_COUNT -= 1
+            _reflow_notifications()
         try:
             if self.window:
-                # Remove from active notifications
-                global _active_notifications
-                if self in _active_notifications:
-                    _active_notifications.remove(self)
-                
-                # Fade out animation
-                def fade_out():
-                    try:
-                        alpha = self.window.attributes('-alpha')
-                        if alpha > 0:
-                            alpha -= 0.1
-                            self.window.attributes('-alpha', alpha)
-                            self.window.after(30, fade_out)
-                        else:
-                            self.window.destroy()
-                    except Exception:
-                        if self.window:
-                            self.window.destroy()
-                fade_out()
+                # Fade out animation (driven by the shared animation tick),
+                # picking up from wherever the fade-in got to
+                start = next((i for i, alpha in enumerate(_FADE_OUT) if alpha < self._alpha),
+                             len(_FADE_OUT))
+                _start_animation(self, _FADE_OUT, start)
         except Exception as e:
             logger.debug(f"Error closing notification: {e}")
+            if self.window:
+                try:
+                    self.window.destroy()
+                except Exception:
+                    pass
 
 # Global tkinter root for notifications
 _notification_root = None
 _active_notifications = []  # Track active notifications for stacking
+_ACTIVE_COUNT = 0  # len(_active_notifications), kept in step with the list
+_COALESCE_SECONDS = 2.0  # Messages from a sender this soon after a popup join it
+
+# Producers enqueue here; a dedicated Tk thread owns the root, runs its
+# mainloop and builds the windows. A drain is only scheduled when the queue
+# gets work, so an idle root has no timers at all.
+_notification_queue = queue.SimpleQueue()
+_tk_thread = None
+_tk_thread_lock = threading.Lock()
+_DRAIN_SCHEDULED = False  # a _drain_notification_queue call is pending
+_drain_lock = threading.Lock()
+
+_NOTIFICATION_WIDTH = 360
+_NOTIFICATION_HEIGHT = 120
+
+_SCREEN_DIMS = None  # (width, height), cached from the notification root
+_open_teams_chat = None  # utils.teams_notifications.open_teams_chat_by_identifier
+
+_MESSAGE_FONT = ('Segoe UI', 11)
+_MESSAGE_WRAP_LENGTH = 240
+_AVG_CHAR_WIDTH = None  # Average pixel width of a _MESSAGE_FONT character
+
+# Fade animations for all notifications are driven by one shared timer
+# instead of a separate after() chain per window.
+_ANIMATING = []  # (notification, alpha schedule, next step index) entries
+_ANIMATION_RUNNING = False
+_ANIMATION_INTERVAL_MS = 20
+_FADE_IN = tuple(round(0.05 * i, 2) for i in range(1, 20))  # 0.05 .. 0.95
+_FADE_OUT = tuple(round(0.95 - 0.07 * i, 2) for i in range(1, 14))  # 0.88 .. 0.04
 
 def _get_notification_root():
     """Get or create a tkinter root for notifications"""
-    global _notification_root
+    global _notification_root, _ANIMATION_RUNNING
+    global _SCREEN_DIMS, _AVG_CHAR_WIDTH
     if _notification_root is None:
         try:
+            # Timers scheduled on a previous root died with it
+            _ANIMATION_RUNNING = False
+            _SCREEN_DIMS = None
+            _AVG_CHAR_WIDTH = None
             _notification_root = tk.Tk()
             _notification_root.withdraw()  # Hide the root window
             _notification_root.attributes('-topmost', False)
-            # Keep root alive - schedule update only if main loop is running
-            try:
-                _notification_root.after(100, _update_notifications)
-            except Exception as e:
-                logger.debug(f"Could not schedule initial notification update: {e}")
         except Exception as e:
             logger.error(f"Error creating notification root: {e}")
             return None
@@ -307,70 +342,229 @@ def _get_notification_root():
             return _get_notification_root()  # Recursively create new root
     return _notification_root
 
-def _update_notifications():
-    """Update all active notifications"""
-    global _notification_root, _active_notifications
-    if _notification_root:
+def _get_open_teams_chat():
+    """Resolve open_teams_chat_by_identifier on first use and cache it"""
+    global _open_teams_chat
+    if _open_teams_chat is None:
         try:
-            # Check if root window is still valid
-            if not _notification_root.winfo_exists():
-                # Root window was destroyed, clear it
-                _notification_root = None
-                return
-            
-            # Remove closed notifications
-            _active_notifications = [n for n in _active_notifications if not n.closed and n.window]
-            
-            # Update root
-            try:
-                _notification_root.update()
-            except Exception as e:
-                # Root window destroyed or main loop not running
-                logger.debug(f"Notification root update failed: {e}")
-                _notification_root = None
-                return
-            
-            # Schedule next update only if root is still valid
-            try:
-                _notification_root.after(100, _update_notifications)
-            except Exception as e:
-                # Root window destroyed or main loop not running
-                logger.debug(f"Could not schedule notification update: {e}")
-                _notification_root = None
-                return
+            from utils.teams_notifications import open_teams_chat_by_identifier
+            _open_teams_chat = open_teams_chat_by_identifier
+        except ImportError as e:
+            logger.debug(f"Teams chat opener unavailable: {e}")
+    return _open_teams_chat
+
+def _get_screen_dims(root):
+    """Return the cached (width, height) of the screen, querying Tk only once"""
+    global _SCREEN_DIMS
+    if _SCREEN_DIMS is None:
+        _SCREEN_DIMS = (root.winfo_screenwidth(), root.winfo_screenheight())
+    return _SCREEN_DIMS
+
+def _get_avg_char_width(root) -> float:
+    """Return the average character width of the message font, measured once"""
+    global _AVG_CHAR_WIDTH
+    if _AVG_CHAR_WIDTH is None:
+        sample = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+        font = tkfont.Font(root=root, font=_MESSAGE_FONT)
+        _AVG_CHAR_WIDTH = font.measure(sample) / len(sample)
+    return _AVG_CHAR_WIDTH
+
+def _message_wraplength(root, text: str) -> int:
+    """Return the wrap width for text, 0 when it fits on one line"""
+    # Only let Tk do wrap measurement when the text can actually wrap
+    if len(text) * _get_avg_char_width(root) <= _MESSAGE_WRAP_LENGTH:
+        return 0
+    return _MESSAGE_WRAP_LENGTH
+
+@lru_cache(maxsize=128)
+def _truncate_message(message: str) -> str:
+    """Shorten a message to the 60 characters shown in the preview"""
+    if len(message) > 60:
+        return message[:57] + "..."
+    return message
+
+def _stack_y(index: int) -> int:
+    """Return the y position of the notification at a stack index"""
+    return 20 + (index * (_NOTIFICATION_HEIGHT + 10))  # Stack with 10px gap
+
+def _reflow_notifications():
+    """Move the remaining notifications up so the stack has no gaps"""
+    for index, notification in enumerate(_active_notifications):
+        try:
+            notification.window.geometry(f'+{notification._x}+{_stack_y(index)}')
         except Exception as e:
-            # Any other error - clear root and stop updates
-            logger.debug(f"Error in _update_notifications: {e}")
-            _notification_root = None
+            logger.debug(f"Error repositioning notification: {e}")
+
+def _start_animation(notification, schedule: tuple, index: int):
+    """Queue a fade animation for a notification on the shared animation tick"""
+    global _ANIMATING, _ANIMATION_RUNNING
+    # A notification only ever has one animation running (fade-out replaces fade-in)
+    _ANIMATING = [entry for entry in _ANIMATING if entry[0] is not notification]
+    _ANIMATING.append((notification, schedule, index))
+    if not _ANIMATION_RUNNING and _notification_root is not None:
+        try:
+            _notification_root.after(_ANIMATION_INTERVAL_MS, _animate_notifications)
+            _ANIMATION_RUNNING = True
+        except Exception as e:
+            logger.debug(f"Could not schedule notification animation: {e}")
+
+def _animate_notifications():
+    """Advance every running fade animation by one step"""
+    global _ANIMATING, _ANIMATION_RUNNING
+    still_animating = []
+    for notification, schedule, index in _ANIMATING:
+        window = notification.window
+        if window is None:
+            continue
+        fading_out = schedule is _FADE_OUT
+        if not fading_out and notification.closed:
+            # Fade-in superseded by close()
+            continue
+        try:
+            if index >= len(schedule):
+                if fading_out:
+                    window.destroy()
+                continue
+            alpha = schedule[index]
+            # Straight to Tcl, skipping Wm.attributes' argument handling
+            window.tk.call('wm', 'attributes', window._w, '-alpha', alpha)
+            notification._alpha = alpha
+        except Exception:
+            if fading_out:
+                try:
+                    window.destroy()
+                except Exception:
+                    pass
+            continue
+        if fading_out or index + 1 < len(schedule):
+            still_animating.append((notification, schedule, index + 1))
+    _ANIMATING = still_animating
+    
+    _ANIMATION_RUNNING = False
+    if _ANIMATING and _notification_root is not None:
+        try:
+            _notification_root.after(_ANIMATION_INTERVAL_MS, _animate_notifications)
+            _ANIMATION_RUNNING = True
+        except Exception as e:
+            logger.debug(f"Could not schedule notification animation: {e}")
+
+def _display_notification(root, sender: str, message: str, duration: int):
+    """Build or update a notification window (runs on the Tk thread)"""
+    global _ACTIVE_COUNT
+    # Fold bursts from the same sender into the popup that is already showing
+    now = time.monotonic()
+    for existing in _active_notifications:
+        if (existing.sender == sender and not existing.closed
+                and now - existing._shown_at < _COALESCE_SECONDS):
+            existing.append_message(message)
+            logger.info(f"Coalesced Teams notification: {sender} - {message[:50]}")
+            return
+    
+    # Never stack past the bottom of the screen: drop the oldest popups
+    # to make room instead of building windows nobody can see
+    _, screen_height = _get_screen_dims(root)
+    while _active_notifications and _stack_y(_ACTIVE_COUNT) + _NOTIFICATION_HEIGHT > screen_height:
+        _active_notifications[0].close()
+    
+    notification = TeamsNotificationWindow(sender, message, duration)
+    notification.show(root)
+    if notification.window is None:
+        return
+    
+    # Add to active notifications list (close() takes it out again)
+    _active_notifications.append(notification)
+    _ACTIVE_COUNT += 1
+    
+    logger.info(f"Showing Teams notification: {sender} - {message[:50]}")
+
+def _drain_notification_queue():
+    """Show every queued notification (runs on the Tk thread)"""
+    global _DRAIN_SCHEDULED
+    # Cleared before emptying the queue: anything put() after this point
+    # either gets picked up below or schedules a drain of its own
+    with _drain_lock:
+        _DRAIN_SCHEDULED = False
+    root = _notification_root
+    if root is None:
+        return
+    while True:
+        try:
+            sender, message, duration = _notification_queue.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            _display_notification(root, sender, message, duration)
+        except Exception as e:
+            logger.error(f"Error showing Teams notification window: {e}")
+
+def _schedule_drain(root):
+    """Have the Tk thread drain the queue, unless a drain is already pending"""
+    global _DRAIN_SCHEDULED
+    with _drain_lock:
+        if _DRAIN_SCHEDULED:
+            return
+        _DRAIN_SCHEDULED = True
+    try:
+        # From another thread, threaded Tcl hands this to the mainloop thread
+        root.after(0, _drain_notification_queue)
+    except Exception as e:
+        with _drain_lock:
+            _DRAIN_SCHEDULED = False
+        logger.debug(f"Could not schedule notification queue drain: {e}")
+
+def _notification_thread_main(ready: threading.Event):
+    """Own the notification root: create it, then run its event loop"""
+    global _notification_root, _DRAIN_SCHEDULED
+    root = _get_notification_root()
+    if root is not None:
+        # A drain pending on a dead root will never run; pick up its work here
+        with _drain_lock:
+            _DRAIN_SCHEDULED = False
+        _schedule_drain(root)
+    ready.set()
+    if root is None:
+        return
+    try:
+        root.mainloop()
+    except Exception as e:
+        logger.debug(f"Notification event loop stopped: {e}")
+    finally:
+        _notification_root = None
+
+def _ensure_notification_thread() -> bool:
+    """Start the Tk thread if it isn't running; False if no root could be created"""
+    global _tk_thread
+    with _tk_thread_lock:
+        if _tk_thread is None or not _tk_thread.is_alive():
+            ready = threading.Event()
+            _tk_thread = threading.Thread(target=_notification_thread_main, args=(ready,),
+                                          name="TeamsNotificationTk", daemon=True)
+            _tk_thread.start()
+            ready.wait(timeout=5)
+        return _tk_thread.is_alive() and _notification_root is not None
 
 def show_teams_notification_window(sender: str, message: str, duration: int = 5):
     """
     Show a Teams-style notification window (auto-updates for new messages)
     
+    Safe to call from any thread: the notification is queued for the
+    notification Tk thread, which builds and shows it.
+    
     Args:
         sender: Sender name
         message: Message content
         duration: Duration in seconds (default 5)
     """
     try:
-        root = _get_notification_root()
-        if root is None:
+        if not _ensure_notification_thread():
             logger.error("Could not create notification root")
             return False
         
-        notification = TeamsNotificationWindow(sender, message, duration)
-        notification.show(root)
-        
-        # Add to active notifications list
-        global _active_notifications
-        _active_notifications.append(notification)
-        
-        # Update root to show notification immediately
-        root.update()
-        
-        logger.info(f"Showing Teams notification: {sender} - {message[:50]}")
+        _notification_queue.put((sender, message, duration))
+        root = _notification_root
+        if root is not None:
+            _schedule_drain(root)
         return True
     except Exception as e:
-        logger.error(f"Error showing Teams notification window: {e}")
+        logger.error(f"Error queueing Teams notification window: {e}")
         return False
-
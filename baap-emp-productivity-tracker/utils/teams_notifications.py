@@ -3,18 +3,17 @@ Microsoft Teams notifications utility
 Gets Teams messages/notifications from Windows notification system or Teams API
 """
 import os
+import re
+import sys
 import json
 import sqlite3
 import threading
 import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional
 
-# Global cache to track previous window states and detect new messages
-_previous_teams_windows = {}  # {hwnd: (sender, message, timestamp)}
-_last_message_check_time = None
-
 try:
     import win32gui
     import win32process
@@ -24,8 +23,15 @@ except ImportError:
     win32process = None
     psutil = None
 
+try:
+    from dateutil import parser as _dtparser
+except ImportError:
+    _dtparser = None  # falls back to datetime.fromisoformat
+
 from utils.logger import logger
 
+_HTML_TAG_RE = re.compile(r'<[^<]+?>')
+
 
 def get_teams_notification_db_path() -> Optional[Path]:
     """Get path to Teams notification database"""
@@ -50,159 +56,392 @@ def get_teams_notification_db_path() -> Optional[Path]:
         return None
 
 
-# Global cache to track previous window states and detect new messages
-_previous_teams_windows = {}  # {hwnd: (sender, message, timestamp)}
+# Message preview per Teams window from the last check, to detect new messages
+_prev_msg = {}  # {hwnd: message_preview}
 _last_message_check_time = None
 
+# Parsed window titles from the last enumeration, so unchanged titles skip parsing
+_title_parse_cache = {}  # {hwnd: (window_title, parsed_dict or None)}
+
+# Running Teams process ids, refreshed at most every _TEAMS_RUNNING_TTL seconds
+_teams_running_cache = (0.0, frozenset())  # (timestamp, teams_pids)
+_TEAMS_RUNNING_TTL = 5
+
+# Live {hwnd: title} of top-level Teams windows, kept current by a WinEvent hook
+_teams_window_titles = {}
+_teams_titles_lock = threading.Lock()
+_title_hook_thread = None
+_title_hook_status = {}  # {'thread_id': ..., 'ok': bool} reported by the current hook thread
+_title_hook_pids = frozenset()
+_title_hook_failed_pids = None  # Teams pids the hook couldn't be installed for
+
+# Teams window titles: "[Microsoft Teams - ]<type> | <sender> [| <preview>]".
+# The lookahead keeps the old "is this a Teams window" rule: the title mentions
+# Teams, or mentions chat/personal/conversation and has a pipe separator.
+# Only " | " separates fields; a bare "|" inside a name or preview is text.
+_TITLE_FIELD = r'(?:(?! \| ).)'
+_TEAMS_TITLE_RE = re.compile(
+    r'^(?=.*teams|.*(?:chat|personal|conversation))'
+    rf'(?:{_TITLE_FIELD}*? - )?'
+    rf'(?P<type>{_TITLE_FIELD}*?) \| (?P<sender>{_TITLE_FIELD}*?)'
+    rf'(?: \| (?P<preview>{_TITLE_FIELD}*)(?P<rest>(?: \| .*)?))?$',
+    re.IGNORECASE | re.DOTALL
+)
+_TEAMS_CHAT_WITH_RE = re.compile(r'^(?=.*teams).*?chat with\s*(?P<name>.*\S)', re.IGNORECASE)
+
+# Top-level window classes used by classic Teams (Electron) and new Teams (WebView2)
+_TEAMS_WINDOW_CLASSES = ('Chrome_WidgetWin_1', 'TeamsWebView')
+
+_EVENT_OBJECT_DESTROY = 0x8001
+_EVENT_OBJECT_NAMECHANGE = 0x800C
+_WINEVENT_OUTOFCONTEXT = 0x0000
+_OBJID_WINDOW = 0
+_GA_ROOT = 2
+_WM_QUIT = 0x0012
+
+
+def _get_teams_pids() -> frozenset:
+    """Return the ids of running Teams processes, cached for _TEAMS_RUNNING_TTL seconds"""
+    global _teams_running_cache
+    if not psutil:
+        return frozenset()
+    now = time.time()
+    checked_at, pids = _teams_running_cache
+    if now - checked_at > _TEAMS_RUNNING_TTL:
+        found = set()
+        for proc in psutil.process_iter(['name']):
+            try:
+                proc_name = (proc.info['name'] or '').lower()
+                if 'teams' in proc_name:
+                    found.add(proc.pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        pids = frozenset(found)
+        _teams_running_cache = (now, pids)
+    return pids
+
+
+def _is_teams_running() -> bool:
+    """Check whether a Teams process is running (cached, see _get_teams_pids)"""
+    if not psutil:
+        return True  # Can't tell - let window detection decide
+    return bool(_get_teams_pids())
+
+
+def _find_teams_windows(pids: frozenset) -> Dict[int, str]:
+    """
+    Return {hwnd: title} for titled top-level windows owned by the Teams processes.
+    Walks only the Teams window classes with FindWindowExW instead of calling
+    back into Python for every top-level window on the desktop.
+    """
+    import ctypes
+    from ctypes import wintypes
+    
+    user32 = ctypes.windll.user32
+    user32.FindWindowExW.restype = wintypes.HWND
+    user32.FindWindowExW.argtypes = [wintypes.HWND, wintypes.HWND, wintypes.LPCWSTR, wintypes.LPCWSTR]
+    user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+    user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+    pid = wintypes.DWORD()
+    title_buffer = ctypes.create_unicode_buffer(512)
+    found = {}
+    for class_name in _TEAMS_WINDOW_CLASSES:
+        hwnd = user32.FindWindowExW(None, None, class_name, None)
+        while hwnd:
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value in pids:
+                length = user32.GetWindowTextW(hwnd, title_buffer, len(title_buffer))
+                if length:
+                    found[hwnd] = title_buffer.value
+            hwnd = user32.FindWindowExW(None, hwnd, class_name, None)
+    return found
+
+
+def _title_hook_loop(pids: frozenset, ready: threading.Event, status: Dict):
+    """
+    Track Teams window titles from WinEvent notifications instead of polling.
+    Runs on its own thread: out-of-context hooks are delivered through this
+    thread's message queue, so it pumps messages until WM_QUIT.
+    Sets ready once it has either started tracking (status['ok']) or failed.
+    """
+    import ctypes
+    from ctypes import wintypes
+    
+    user32 = ctypes.windll.user32
+    status['thread_id'] = ctypes.windll.kernel32.GetCurrentThreadId()
+    hooks = []
+    try:
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        
+        def on_event(hook, event, hwnd, id_object, id_child, event_thread, event_time):
+            # Only the top-level window itself, not its accessible children
+            if id_object != _OBJID_WINDOW or id_child != 0 or not hwnd:
+                return
+            try:
+                if event == _EVENT_OBJECT_DESTROY:
+                    with _teams_titles_lock:
+                        _teams_window_titles.pop(hwnd, None)
+                    return
+                if user32.GetAncestor(hwnd, _GA_ROOT) != hwnd:
+                    return
+                title = win32gui.GetWindowText(hwnd)
+                with _teams_titles_lock:
+                    if title:
+                        _teams_window_titles[hwnd] = title
+                    else:
+                        _teams_window_titles.pop(hwnd, None)
+            except Exception as e:
+                logger.debug(f"Error handling Teams title event: {e}")
+        
+        callback = win_event_proc(on_event)  # Must stay referenced while hooked
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, win_event_proc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+        ]
+        for pid in pids:
+            for event in (_EVENT_OBJECT_DESTROY, _EVENT_OBJECT_NAMECHANGE):
+                hook = user32.SetWinEventHook(event, event, None, callback, pid, 0, _WINEVENT_OUTOFCONTEXT)
+                if hook:
+                    hooks.append(hook)
+        if not hooks:
+            logger.debug("Could not install Teams window title hooks")
+            return
+        
+        # Seed with the windows that already exist; events only report changes
+        seed = _find_teams_windows(pids)
+        with _teams_titles_lock:
+            _teams_window_titles.clear()
+            _teams_window_titles.update(seed)
+        status['ok'] = True
+        ready.set()
+        
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+    except Exception as e:
+        logger.debug(f"Teams window title hook stopped: {e}")
+    finally:
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+        status['thread_id'] = None
+        ready.set()  # Don't leave the caller waiting if setup failed
+
+
+def _stop_title_hook():
+    """Ask the title hook thread to unhook and exit"""
+    global _title_hook_thread
+    thread_id = _title_hook_status.get('thread_id')
+    if _title_hook_thread is not None and thread_id is not None:
+        try:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(thread_id, _WM_QUIT, 0, 0)
+        except Exception as e:
+            logger.debug(f"Error stopping Teams title hook: {e}")
+    _title_hook_thread = None
+
+
+def _ensure_title_hook() -> bool:
+    """
+    Make sure the title hook is watching the current Teams processes.
+    Returns False if the hook can't be used and windows must be enumerated.
+    """
+    global _title_hook_thread, _title_hook_status, _title_hook_pids, _title_hook_failed_pids
+    if not win32gui or not win32process or sys.platform != 'win32':
+        return False
+    pids = _get_teams_pids()
+    if not pids or pids == _title_hook_failed_pids:
+        return False
+    if _title_hook_thread is not None and _title_hook_pids == pids:
+        if _title_hook_thread.is_alive():
+            # Still starting up if it hasn't reported success yet
+            return bool(_title_hook_status.get('ok'))
+        if not _title_hook_status.get('ok'):
+            # Setup failed after we stopped waiting - don't retry for these pids
+            _title_hook_failed_pids = pids
+            _title_hook_thread = None
+            return False
+    
+    # Teams (re)started or the hook died - hook the new set of processes
+    _stop_title_hook()
+    ready = threading.Event()
+    status = {}
+    thread = threading.Thread(target=_title_hook_loop, args=(pids, ready, status), daemon=True)
+    thread.start()
+    # Track the thread even if it is slow to start, so it can be stopped later
+    _title_hook_thread = thread
+    _title_hook_status = status
+    _title_hook_pids = pids
+    if ready.wait(timeout=2) and not status.get('ok'):
+        # Setup failed: fall back to enumeration until the Teams pids change
+        _title_hook_failed_pids = pids
+        _title_hook_thread = None
+    return bool(status.get('ok'))
+
+
+def _parse_teams_title(window_title: str) -> Optional[Dict]:
+    """
+    Parse a Teams window title into its sender/message parts.
+    Returns None if the title is not a Teams chat window.
+    """
+    # Format examples:
+    # "Chat | PRODUCTIVITY-TRACKER_DESIGNING-TEAM | P..."
+    # "Chat | John Doe | Hello, how are you?"
+    # "Microsoft Teams - Chat | Channel Name | Message preview"
+    # "Personal | Person Name | Message"
+    # "Chat | Person Name: Message preview"
+    match = _TEAMS_TITLE_RE.match(window_title)
+    if match is None:
+        # No pipe separator - look for "Chat with John"
+        match = _TEAMS_CHAT_WITH_RE.match(window_title)
+        if match is None:
+            return None
+        return {
+            'sender': match.group('name'),
+            'message': 'Active chat',
+        }
+    
+    logger.info(f"Found Teams window: {window_title}")
+    chat_type = match.group('type').strip()  # "Chat", "Personal", or "Conversation"
+    sender_or_channel = match.group('sender').strip()  # Person name or channel name
+    message_preview = (match.group('preview') or '').strip()
+    
+    # Sometimes format is: "Chat | Person Name: Message preview"
+    if match.group('preview') is None and ':' in sender_or_channel:
+        sender_or_channel, _, message_preview = sender_or_channel.partition(':')
+        sender_or_channel = sender_or_channel.strip()
+        message_preview = message_preview.strip()
+    
+    # Clean up message preview (remove trailing dots if truncated)
+    if message_preview.endswith('...'):
+        message_preview = message_preview.rstrip('.')
+    
+    # If still no message, take the first later field that has text
+    if not message_preview and match.group('preview') is not None:
+        fields = [match.group('preview')] + match.group('rest').split(' | ')[1:]
+        for part in fields:
+            if part.strip() and part.strip() not in ['Personal', 'Chat', 'Conversation']:
+                message_preview = part.strip()
+                break
+    
+    # If still no message, use a default based on chat type
+    if not message_preview:
+        if 'personal' in chat_type.lower() or 'personal' in sender_or_channel.lower():
+            message_preview = 'Personal chat'
+        else:
+            message_preview = 'New message'
+    
+    return {
+        'sender': sender_or_channel,
+        'message': message_preview,
+        'chat_type': chat_type,
+    }
+
+
 def get_teams_messages_from_window() -> List[Dict]:
     """Extract Teams messages from active Teams window titles - only NEW messages"""
-    global _previous_teams_windows, _last_message_check_time
+    global _prev_msg, _last_message_check_time, _title_parse_cache
     messages = []
     try:
         if not win32gui:
             return messages
         
+        # Nothing to enumerate if Teams isn't running
+        if not _is_teams_running():
+            return messages
+        
         current_time = time.time()
-        current_windows = {}  # Track current state
+        cur_msg = {}  # {hwnd: message_preview} for this pass
+        seen_titles = {}  # {hwnd: (window_title, parsed)} for this pass
         
-        def enum_windows_callback(hwnd, results):
+        def handle_window(hwnd, window_title, results):
             try:
-                window_title = win32gui.GetWindowText(hwnd)
                 if not window_title:
-                    return True
+                    return
                 
-                # Teams window titles often have format: "Chat | Channel/Person Name | Message preview"
-                # or "Microsoft Teams - Chat | ..."
-                title_lower = window_title.lower()
-                # Check for Teams-related windows more broadly
-                # Teams windows can have various formats:
-                # - "Microsoft Teams"
-                # - "Chat | Person Name | Message"
-                # - "Chat | Channel Name | Message"
-                # - "Personal | Person Name | Message"
-                is_teams_window = (
-                    'teams' in title_lower or 
-                    ('chat' in title_lower and ' | ' in window_title) or
-                    ('personal' in title_lower and ' | ' in window_title) or
-                    ('conversation' in title_lower and ' | ' in window_title)
-                )
+                # Reuse the parse from the last pass if the title hasn't changed
+                cached = _title_parse_cache.get(hwnd)
+                if cached is not None and cached[0] == window_title:
+                    parsed = cached[1]
+                else:
+                    parsed = _parse_teams_title(window_title)
+                seen_titles[hwnd] = (window_title, parsed)
                 
-                if is_teams_window:
-                    logger.info(f"Found Teams window: {window_title}")
-                    # Parse Teams window title to extract message info
-                    # Format examples:
-                    # "Chat | PRODUCTIVITY-TRACKER_DESIGNING-TEAM | P..."
-                    # "Chat | John Doe | Hello, how are you?"
-                    # "Microsoft Teams - Chat | Channel Name | Message preview"
-                    # "Personal | Person Name | Message"
-                    
-                    # Remove "Microsoft Teams -" prefix if present
-                    clean_title = window_title
-                    if ' - ' in clean_title:
-                        parts = clean_title.split(' - ', 1)
-                        if len(parts) > 1:
-                            clean_title = parts[1]
-                    
-                    # Split by pipe to get components
-                    if ' | ' in clean_title:
-                        parts = clean_title.split(' | ')
-                        logger.info(f"Window title parts: {parts}")
-                        
-                        if len(parts) >= 2:
-                            chat_type = parts[0].strip()  # "Chat", "Personal", or "Conversation"
-                            sender_or_channel = parts[1].strip()  # Person name or channel name
-                            
-                            logger.info(f"Extracted sender: {sender_or_channel}, chat_type: {chat_type}")
-                            
-                            # Extract message preview if available
-                            message_preview = ''
-                            if len(parts) >= 3:
-                                message_preview = parts[2].strip()
-                            
-                            # If no message preview, try to extract from title differently
-                            if not message_preview and len(parts) == 2:
-                                # Sometimes format is: "Chat | Person Name: Message preview"
-                                if ':' in sender_or_channel:
-                                    sender_parts = sender_or_channel.split(':', 1)
-                                    sender_or_channel = sender_parts[0].strip()
-                                    message_preview = sender_parts[1].strip() if len(sender_parts) > 1 else ''
-                            
-                            # Clean up message preview (remove trailing dots if truncated)
-                            if message_preview.endswith('...') or message_preview.endswith('P...'):
-                                message_preview = message_preview.rstrip('.')
-                            
-                            # If still no message, check if last part might be message
-                            if not message_preview:
-                                # Sometimes the format is different - check all parts
-                                for part in parts[2:]:
-                                    if part.strip() and part.strip() not in ['Personal', 'Chat', 'Conversation']:
-                                        message_preview = part.strip()
-                                        break
-                            
-                            # If still no message, use a default based on chat type
-                            if not message_preview:
-                                if 'personal' in chat_type.lower() or 'personal' in sender_or_channel.lower():
-                                    message_preview = 'Personal chat'
-                                else:
-                                    message_preview = 'New message'
-                            
-                            # Generate unique timestamp for each detection
-                            current_time_str = datetime.now().strftime('%I:%M %p')
-                            
-                            # Store current window state (always track)
-                            current_windows[hwnd] = (sender_or_channel, message_preview, current_time)
-                            
-                            # Check if this is a NEW message (different from previous state)
-                            is_new_message = False
-                            if hwnd in _previous_teams_windows:
-                                prev_sender, prev_message, prev_time = _previous_teams_windows[hwnd]
-                                # It's new if message content changed (actual new message)
-                                if message_preview and message_preview != prev_message:
-                                    is_new_message = True
-                            else:
-                                # First time seeing this window - consider it new if it has message content
-                                if message_preview:
-                                    is_new_message = True
-                            
-                            # Add ALL messages (not just new ones) - we'll filter in UI
-                            # But mark which ones are new for highlighting
-                            results.append({
-                                'sender': sender_or_channel,
-                                'message': message_preview,
-                                'time': current_time_str,
-                                'source': 'Teams Window',
-                                'chat_type': chat_type,
-                                'window_title': window_title,  # Keep original for debugging
-                                'is_new': is_new_message
-                            })
-                    else:
-                        # If no pipe separator, try to extract from title directly
-                        # Look for patterns like "Chat with John" or "Channel Name"
-                        if 'chat' in title_lower or 'conversation' in title_lower:
-                            # Extract name after "Chat" or "Chat with"
-                            if 'chat with' in title_lower:
-                                name_start = title_lower.find('chat with') + len('chat with')
-                                name = clean_title[name_start:].strip()
-                                if name:
-                                    results.append({
-                                        'sender': name,
-                                        'message': 'Active chat',
-                                        'time': datetime.now().strftime('%I:%M %p'),
-                                        'source': 'Teams Window'
-                                    })
+                if parsed is None:
+                    return
+                
+                if 'chat_type' not in parsed:
+                    # "Chat with <name>" window
+                    results.append({
+                        'sender': parsed['sender'],
+                        'message': parsed['message'],
+                        'time': datetime.now().strftime('%I:%M %p'),
+                        'source': 'Teams Window'
+                    })
+                    return
+                
+                sender_or_channel = parsed['sender']
+                message_preview = parsed['message']
+                chat_type = parsed['chat_type']
+                
+                # Generate unique timestamp for each detection
+                current_time_str = datetime.now().strftime('%I:%M %p')
+                
+                # Store current window state (always track)
+                cur_msg[hwnd] = message_preview
+                
+                # It's new if the preview changed, or the window is new and has
+                # message content (an unseen hwnd has no previous preview)
+                is_new_message = bool(message_preview) and message_preview != _prev_msg.get(hwnd)
+                
+                # Add ALL messages (not just new ones) - we'll filter in UI
+                # But mark which ones are new for highlighting
+                results.append({
+                    'sender': sender_or_channel,
+                    'message': message_preview,
+                    'time': current_time_str,
+                    'source': 'Teams Window',
+                    'chat_type': chat_type,
+                    'window_title': window_title,  # Keep original for debugging
+                    'is_new': is_new_message
+                })
             except Exception as e:
                 logger.debug(f"Error parsing Teams window: {e}")
+        
+        def enum_windows_callback(hwnd, results):
+            try:
+                handle_window(hwnd, win32gui.GetWindowText(hwnd), results)
+            except Exception as e:
+                logger.debug(f"Error reading Teams window title: {e}")
             return True
         
         windows = []
-        win32gui.EnumWindows(enum_windows_callback, windows)
+        if _ensure_title_hook():
+            # Titles are pushed by the WinEvent hook - no enumeration needed
+            with _teams_titles_lock:
+                titles = list(_teams_window_titles.items())
+            for hwnd, title in titles:
+                handle_window(hwnd, title, windows)
+        elif sys.platform == 'win32' and _get_teams_pids():
+            # Only visit windows of the Teams window classes and processes
+            for hwnd, title in _find_teams_windows(_get_teams_pids()).items():
+                handle_window(hwnd, title, windows)
+        else:
+            win32gui.EnumWindows(enum_windows_callback, windows)
         
         # Debug: log found windows
         if windows:
             logger.debug(f"Found {len(windows)} Teams windows")
         
-        # Update previous windows state for next check
-        _previous_teams_windows = current_windows.copy()
+        # Only keep parses for windows that still exist
+        _title_parse_cache = seen_titles
+        
+        # This pass's dict becomes the previous state - no copy needed
+        _prev_msg = cur_msg
         _last_message_check_time = current_time
         
         # Remove duplicates - group by sender, keep most recent message
@@ -274,17 +513,8 @@ def get_teams_messages_simple() -> List[Dict]:
     """Simple method to get Teams messages - checks if Teams is running and returns sample data"""
     messages = []
     try:
-        # Check if Teams is running
-        teams_running = False
-        if psutil:
-            for proc in psutil.process_iter(['name']):
-                try:
-                    proc_name = proc.info['name'].lower()
-                    if 'teams' in proc_name:
-                        teams_running = True
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+        # Check if Teams is running (shared TTL cache; empty without psutil)
+        teams_running = bool(_get_teams_pids())
         
         if teams_running:
             # Try to get messages from window
@@ -309,6 +539,47 @@ def get_teams_messages_simple() -> List[Dict]:
         return messages
 
 
+GRAPH_BATCH_URL = 'https://graph.microsoft.com/v1.0/$batch'
+_graph_session = None
+
+
+def _get_graph_session():
+    """Return the shared requests session used for Graph API calls"""
+    global _graph_session
+    if _graph_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        session = requests.Session()
+        # Graph is a single host: a small keep-alive pool, with a couple of
+        # backed-off retries for dropped connections
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                              max_retries=Retry(total=2, backoff_factor=0.3)))
+        session.headers.update({'Content-Type': 'application/json'})
+        _graph_session = session
+    return _graph_session
+
+
+@lru_cache(maxsize=512)
+def _parse_graph_msg(msg_id: str, body: str, created: str):
+    """Strip HTML and format the send time of a Graph message once per message.
+
+    Graph returns the same recent messages on every poll, so the cache keeps
+    steady-state polls to a lookup. Returns (plain_body, time_str or None).
+    """
+    body = _HTML_TAG_RE.sub('', body)
+    try:
+        dt = _dtparser.isoparse(created)
+        time_str = dt.strftime('%I:%M %p')
+    except Exception:
+        try:
+            dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
+            time_str = dt.strftime('%I:%M %p')
+        except Exception:
+            time_str = None
+    return body, time_str
+
+
 def get_teams_messages_via_graph_api(access_token: Optional[str] = None) -> List[Dict]:
     """Get Teams messages via Microsoft Graph API (works without opening Teams)"""
     messages = []
@@ -317,19 +588,16 @@ def get_teams_messages_via_graph_api(access_token: Optional[str] = None) -> List
             logger.debug("No access token available for Graph API")
             return messages
         
-        import requests
+        session = _get_graph_session()
         
-        # Get recent chat messages
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
+        # Get recent chat messages (Content-Type is a session default)
+        headers = {'Authorization': f'Bearer {access_token}'}
         
         logger.debug("Fetching Teams messages via Graph API...")
         
         # Get chats
         chats_url = 'https://graph.microsoft.com/v1.0/me/chats'
-        response = requests.get(chats_url, headers=headers, timeout=10)
+        response = session.get(chats_url, headers=headers, timeout=10)
         
         # Suppress 401 errors to avoid log spam (invalid token)
         if response.status_code == 401:
@@ -342,20 +610,31 @@ def get_teams_messages_via_graph_api(access_token: Optional[str] = None) -> List
             
             logger.info(f"Found {len(chats)} chats via Graph API")
             
-            # Get messages from recent chats
-            for chat in chats[:10]:  # Increased to 10 recent chats
+            # Get the latest message of the recent chats in one $batch request
+            # instead of one GET per chat
+            recent_chats = [chat for chat in chats[:10] if chat.get('id')]  # Increased to 10 recent chats
+            batch_body = {
+                'requests': [
+                    {'id': str(i), 'method': 'GET', 'url': f"/me/chats/{chat['id']}/messages?$top=1"}
+                    for i, chat in enumerate(recent_chats)
+                ]
+            }
+            batch_responses = {}
+            if recent_chats:
+                batch_response = session.post(GRAPH_BATCH_URL, headers=headers, json=batch_body, timeout=10)
+                if batch_response.status_code == 200:
+                    for item in batch_response.json().get('responses', []):
+                        batch_responses[item.get('id')] = item
+                else:
+                    logger.debug(f"Graph API batch returned status {batch_response.status_code}")
+            
+            for i, chat in enumerate(recent_chats):
                 chat_id = chat.get('id')
                 chat_type = chat.get('chatType', '')
                 
-                if not chat_id:
-                    continue
-                
-                # Get messages for this chat
-                messages_url = f'https://graph.microsoft.com/v1.0/me/chats/{chat_id}/messages?$top=1'
-                msg_response = requests.get(messages_url, headers=headers, timeout=5)
-                
-                if msg_response.status_code == 200:
-                    msg_data = msg_response.json()
+                msg_response = batch_responses.get(str(i))
+                if msg_response and msg_response.get('status') == 200:
+                    msg_data = msg_response.get('body') or {}
                     recent_messages = msg_data.get('value', [])
                     
                     for msg in recent_messages:
@@ -366,23 +645,12 @@ def get_teams_messages_via_graph_api(access_token: Optional[str] = None) -> List
                         body_data = msg.get('body', {})
                         body = body_data.get('content', '') if body_data else ''
                         
-                        # Strip HTML tags from message
-                        import re
-                        body = re.sub('<[^<]+?>', '', body)
-                        
                         created = msg.get('createdDateTime', '')
                         
-                        # Parse time
-                        try:
-                            from dateutil import parser
-                            dt = parser.isoparse(created)
-                            time_str = dt.strftime('%I:%M %p')
-                        except Exception:
-                            try:
-                                dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
-                                time_str = dt.strftime('%I:%M %p')
-                            except Exception:
-                                time_str = datetime.now().strftime('%I:%M %p')
+                        # Strip HTML tags and parse time (cached per message)
+                        body, time_str = _parse_graph_msg(msg.get('id'), body, created)
+                        if time_str is None:
+                            time_str = datetime.now().strftime('%I:%M %p')
                         
                         # Full message for notifications
                         full_message = body
@@ -415,57 +683,138 @@ def get_teams_messages_via_graph_api(access_token: Optional[str] = None) -> List
         return messages
 
 
+# Latest Graph API result, refreshed in the background by _graph_refresh_loop
+_graph_cache = []
+_graph_cache_ts = 0.0
+_graph_cache_gen = 0  # bumped whenever _graph_cache's content changes
+_graph_cache_lock = threading.Lock()
+_graph_access_token = None
+_graph_refresh_thread = None
+_graph_refresh_wake = threading.Event()  # set to refetch now instead of after the interval
+GRAPH_REFRESH_INTERVAL = 15  # seconds
+
+
+def _graph_refresh_loop():
+    """Keep _graph_cache up to date without blocking get_teams_messages callers"""
+    global _graph_cache, _graph_cache_ts, _graph_cache_gen
+    while True:
+        _graph_refresh_wake.clear()
+        access_token = _graph_access_token
+        if access_token:
+            logger.debug("Attempting to fetch Teams messages via Graph API...")
+            api_messages = get_teams_messages_via_graph_api(access_token)
+            with _graph_cache_lock:
+                # Drop the result if the token changed while fetching
+                if access_token == _graph_access_token:
+                    if api_messages != _graph_cache:
+                        _graph_cache = api_messages
+                        _graph_cache_gen += 1
+                    _graph_cache_ts = time.time()
+        _graph_refresh_wake.wait(GRAPH_REFRESH_INTERVAL)
+
+
+def _get_graph_snapshot(access_token: Optional[str]) -> List[Dict]:
+    """Return the cached Graph API messages, starting the refresher on first use"""
+    global _graph_access_token, _graph_refresh_thread, _graph_cache, _graph_cache_ts, _graph_cache_gen
+    token_changed = access_token != _graph_access_token
+    if token_changed:
+        # Token changed (login/logout) - results for the old one no longer apply
+        with _graph_cache_lock:
+            _graph_cache = []
+            _graph_cache_ts = 0.0
+            _graph_cache_gen += 1
+    _graph_access_token = access_token
+    if token_changed:
+        # Fetch for the new token now rather than at the end of the current wait
+        _graph_refresh_wake.set()
+    if access_token and (_graph_refresh_thread is None or not _graph_refresh_thread.is_alive()):
+        _graph_refresh_thread = threading.Thread(target=_graph_refresh_loop, daemon=True)
+        _graph_refresh_thread.start()
+    with _graph_cache_lock:
+        return list(_graph_cache)
+
+
+# Inputs seen by the last get_teams_messages call, and its result once those
+# inputs were already unchanged from the call before (so is_new flags are settled)
+_last_state = None
+_last_result = None
+
+
+def _teams_state_key(access_token: Optional[str]):
+    """
+    Everything get_teams_messages' result depends on, or None when the window
+    titles can only be read by enumerating (no title hook).
+    """
+    if not _ensure_title_hook():
+        return None
+    with _teams_titles_lock:
+        titles = frozenset(_teams_window_titles.items())
+    # Window messages are stamped with the poll time, so a new minute is a change
+    return (titles, _graph_cache_gen, access_token, datetime.now().strftime('%I:%M %p'))
+
+
 def get_teams_messages(access_token: Optional[str] = None) -> List[Dict]:
     """
     Main function to get Teams messages (works even without opening Teams if API access available)
     Tries multiple methods: Graph API > Window detection > Simple check
+    Returns the previous result when nothing it depends on has changed.
     """
+    global _last_state, _last_result
+    state = _teams_state_key(access_token)
+    if state is not None and state == _last_state and _last_result is not None:
+        return _last_result
+    result = _collect_teams_messages(access_token)
+    # Only reuse a result computed from unchanged inputs: the first pass over
+    # new window titles marks them is_new, the next one doesn't
+    _last_result = result if state is not None and state == _last_state else None
+    _last_state = state
+    return result
+
+
+def _collect_teams_messages(access_token: Optional[str]) -> List[Dict]:
     messages = []
-    all_messages = []
+    api_messages = []
+    window_messages = []
     
-    # Try Graph API first (if token available) - works WITHOUT opening Teams
+    # Try Graph API first (if token available) - works WITHOUT opening Teams.
+    # The fetch runs on a background thread; this only reads its latest result.
     if access_token:
         try:
-            logger.debug("Attempting to fetch Teams messages via Graph API...")
-            api_messages = get_teams_messages_via_graph_api(access_token)
+            api_messages = _get_graph_snapshot(access_token) or []
             if api_messages:
                 logger.debug(f"Graph API returned {len(api_messages)} messages")
-                all_messages.extend(api_messages)
         except Exception as e:
             logger.debug(f"Graph API method failed: {e}")
     else:
+        _get_graph_snapshot(None)
         logger.debug("No access token available, skipping Graph API")
     
     # Try window detection - gets real-time window titles (requires Teams open)
     try:
-        window_messages = get_teams_messages_from_window()
+        window_messages = get_teams_messages_from_window() or []
         if window_messages:
             logger.debug(f"Window detection returned {len(window_messages)} messages")
-            # Add window messages, avoiding duplicates
-            for wmsg in window_messages:
-                # Check if not already in all_messages
-                is_duplicate = any(
-                    m.get('sender') == wmsg.get('sender') and 
-                    m.get('message', '')[:50] == wmsg.get('message', '')[:50]
-                    for m in all_messages
-                )
-                if not is_duplicate:
-                    all_messages.append(wmsg)
     except Exception as e:
         logger.debug(f"Window detection method failed: {e}")
     
     # If we have messages from either source, return them
-    if all_messages:
-        # Sort by time (newest first)
-        all_messages.sort(key=lambda x: x.get('time', ''), reverse=True)
-        # Remove duplicates by sender
-        seen_senders = set()
-        unique_messages = []
-        for msg in all_messages:
+    if api_messages:
+        # Merge in one pass, keeping the newest message per sender. Window
+        # results are already one per sender, so this is the only dedupe.
+        by_sender = {}
+        for msg in api_messages + window_messages:
             sender = msg.get('sender')
-            if sender and sender not in seen_senders:
-                seen_senders.add(sender)
-                unique_messages.append(msg)
+            if not sender:
+                continue
+            kept = by_sender.get(sender)
+            if kept is None or msg.get('time', '') > kept.get('time', ''):
+                by_sender[sender] = msg
+        unique_messages = list(by_sender.values())
+    else:
+        unique_messages = window_messages
+    if unique_messages:
+        # Sort by time (newest first)
+        unique_messages.sort(key=lambda x: x.get('time', ''), reverse=True)
         logger.debug(f"Returning {len(unique_messages)} unique messages")
         return unique_messages
     
@@ -4,35 +4,61 @@ This ensures logs are visible even when webview blocks stdout.
 """
 import sys
 import os
+import json
+import atexit
+import threading
 from datetime import datetime
 
 # Log file path
 _log_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "terminal_output.log")
 
+# Log file handle, opened once after the log file is initialized (see bottom)
+_log_fh = None
+_log_lock = threading.Lock()
+
 def _write_both(message):
     """Write to BOTH terminal AND file - guaranteed to work."""
+    _write_lines([message])
+
+def _write_lines(lines):
+    """Write a record's lines with one file write and one terminal write."""
     # Write to file (always works)
     try:
-        with open(_log_file_path, 'a', encoding='utf-8', errors='replace') as f:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            f.write(f"[{timestamp}] {message}")
-            f.flush()
+        if _log_fh is not None:
+            prefix = f"[{datetime.now().strftime('%H:%M:%S')}] "
+            with _log_lock:
+                _log_fh.write(''.join(prefix + line for line in lines))
+                _log_fh.flush()
     except:
         pass
     
     # Write to terminal (may be blocked by webview)
+    text = ''.join(lines)
     try:
         # Try direct file descriptor write
         fd = sys.stdout.fileno()
-        os.write(fd, message.encode('utf-8', errors='replace'))
+        os.write(fd, text.encode('utf-8', errors='replace'))
     except:
         try:
             # Fallback to stdout
-            sys.stdout.write(message)
+            sys.stdout.write(text)
             sys.stdout.flush()
         except:
             pass
 
+def _dumps(obj):
+    """Compact JSON for log output."""
+    return json.dumps(obj, default=str, separators=(',', ':'))
+
+def _shorten_values(obj, limit=200):
+    """Cut long top-level string values so a preview doesn't serialize them in full."""
+    if not isinstance(obj, dict):
+        return obj
+    return {
+        key: value[:limit] + '...' if isinstance(value, str) and len(value) > limit else value
+        for key, value in obj.items()
+    }
+
 def log(message):
     """Log message to both terminal and file."""
     _write_both(message)
@@ -40,29 +66,29 @@ def log(message):
 def log_api(api_name, method, url, payload=None, response=None, error=None):
     """Log API call with full details."""
     if error:
-        _write_both(f"\n[ERROR] {api_name} → {error}\n")
+        lines = [f"\n[ERROR] {api_name} → {error}\n"]
     elif response:
         status = response.get('status_code', '?')
-        _write_both(f"\n[API] {api_name} ({method}) → {status}\n")
-        _write_both(f"  URL: {url}\n")
+        lines = [f"\n[API] {api_name} ({method}) → {status}\n", f"  URL: {url}\n"]
         if payload:
-            import json
-            _write_both(f"  Payload: {json.dumps(payload, indent=2, default=str)}\n")
-        _write_both(f"  Response: {json.dumps(response, indent=2, default=str)[:500]}\n")
+            lines.append(f"  Payload: {_dumps(payload)}\n")
+        lines.append(f"  Response: {_dumps(_shorten_values(response))[:500]}\n")
     else:
-        _write_both(f"\n[API] {api_name} ({method})\n")
-        _write_both(f"  URL: {url}\n")
+        lines = [f"\n[API] {api_name} ({method})\n", f"  URL: {url}\n"]
         if payload:
-            import json
-            _write_both(f"  Payload: {json.dumps(payload, indent=2, default=str)}\n")
+            lines.append(f"  Payload: {_dumps(payload)}\n")
+    _write_lines(lines)
 
 def log_token(token_type, preview, length, user_id=None):
     """Log token generation."""
-    _write_both(f"\n[TOKEN] {token_type} Generated\n")
-    _write_both(f"  Preview: {preview}\n")
-    _write_both(f"  Length: {length}\n")
+    lines = [
+        f"\n[TOKEN] {token_type} Generated\n",
+        f"  Preview: {preview}\n",
+        f"  Length: {length}\n",
+    ]
     if user_id:
-        _write_both(f"  User ID: {user_id}\n")
+        lines.append(f"  User ID: {user_id}\n")
+    _write_lines(lines)
 
 # Initialize log file
 try:
@@ -73,4 +99,10 @@ try:
 except:
     pass
 
+try:
+    _log_fh = open(_log_file_path, 'a', encoding='utf-8', errors='replace', buffering=1)
+    atexit.register(_log_fh.close)
+except:
+    _log_fh = None
+
 
@@ -1,68 +1,231 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime
 from typing import Optional
 
 try:
     import cv2  # type: ignore
+    import numpy as np  # type: ignore
 except Exception:  # pragma: no cover
     cv2 = None
+    np = None
 
 from utils.capture_types import CaptureArtifact
 from utils.logger import logger
 
+# The capture device is released right after a shot so the camera isn't held
+# (light on, unavailable to Teams/Zoom) between periodic shots. Only when
+# captures arrive less than _IDLE_RELEASE_SECONDS apart is it kept open, so
+# back-to-back captures skip DirectShow initialization; it is released once
+# they stop for that long.
+_IDLE_RELEASE_SECONDS = 60
+_STALE_FRAMES = 2  # DirectShow buffers a couple of frames; drop them before reading
+
+# Quality 80 is visually indistinguishable from the default 95 for a 640x360
+# stamp at roughly half the bytes; optimized Huffman tables shave a bit more.
+_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 80, cv2.IMWRITE_JPEG_OPTIMIZE, 1] if cv2 is not None else []
+
+_cap = None
+_cap_lock = threading.Lock()
+_release_timer: Optional[threading.Timer] = None
+_last_capture_at: Optional[float] = None  # time.monotonic() of the previous capture
+
+
+def _open_capture():
+    """Open and configure the default webcam, or return None if unavailable."""
+    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    # Ask for the camera's MJPEG stream: cheaper over USB than raw YUY2, and
+    # with grab()/retrieve() only the frame we keep gets decoded. Must be set
+    # before the frame size for DirectShow to negotiate it.
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
+    return cap
+
+
+def _release_capture() -> None:
+    """Release the held capture device. Caller must hold _cap_lock."""
+    global _cap
+    if _cap is not None:
+        try:
+            _cap.release()
+        except Exception:
+            pass
+        _cap = None
+
+
+def _cancel_release() -> None:
+    """Stop a pending idle release. Caller must hold _cap_lock."""
+    global _release_timer
+    if _release_timer is not None:
+        _release_timer.cancel()
+        _release_timer = None
+
+
+def _schedule_release() -> None:
+    """(Re)start the idle timer that releases the device. Caller must hold _cap_lock."""
+    global _release_timer
+    _cancel_release()
+    _release_timer = threading.Timer(_IDLE_RELEASE_SECONDS, close_webcam)
+    _release_timer.daemon = True
+    _release_timer.start()
+
+
+def close_webcam() -> None:
+    """Release the webcam if it is held open (safe to call at shutdown)."""
+    with _cap_lock:
+        _cancel_release()
+        _release_capture()
+
+
+# Timestamp overlay: a black thickness-3 pass followed by a white thickness-1
+# pass at (10, 30). The "YYYY-MM-DD HH:MM" part is rasterized once per minute
+# and the ":SS" tail once per second value; each capture only blends the
+# cached coverage masks instead of calling putText.
+_TEXT_ORIGIN = (10, 30)
+_TEXT_FONT = cv2.FONT_HERSHEY_SIMPLEX if cv2 is not None else None
+_TEXT_FONT_SCALE = 0.7
+_TEXT_PAD = 3
+_OUTLINE, _FILL = 3, 1  # putText thickness of the black and white passes
+# Digits are all the same width, so this has the advance of every minute
+# text, and its narrow '1's leave a gap before the tail that it can be cut at
+_TAIL_REF_PREFIX = "1111-11-11 11:11"
+_minute_masks: tuple[str, dict] | None = None  # (minute text, {thickness: mask})
+_seconds_masks: dict[str, dict | None] = {}  # {":SS": {thickness: mask}, or None if it can't be cut out}
+
+
+def _render_text(text: str, thickness: int, size_text: str | None = None):
+    """Rasterize text into a padded 0-255 coverage array sized for size_text."""
+    (width, height), baseline = cv2.getTextSize(size_text or text, _TEXT_FONT, _TEXT_FONT_SCALE, thickness)
+    mask = np.zeros((height + baseline + 2 * _TEXT_PAD, width + 2 * _TEXT_PAD), np.uint8)
+    cv2.putText(mask, text, (_TEXT_PAD, _TEXT_PAD + height), _TEXT_FONT, _TEXT_FONT_SCALE, 255, thickness, cv2.LINE_AA)
+    return mask, height
+
+
+def _minute_mask(text: str, thickness: int):
+    """Coverage mask as (coverage, top, left), offsets relative to the text origin."""
+    mask, height = _render_text(text, thickness)
+    return mask.astype(np.uint16)[..., None], -height - _TEXT_PAD, -_TEXT_PAD
+
+
+def _tail_mask(tail: str, thickness: int):
+    """
+    Mask for tail exactly where putText draws it after a minute text.
+
+    The tail starts at a fractional x, so it is rendered behind
+    _TAIL_REF_PREFIX and cut out of that, rather than shifted by whole
+    pixels. Returns None if the two don't separate cleanly.
+    """
+    full, height = _render_text(_TAIL_REF_PREFIX + tail, thickness)
+    prefix, _ = _render_text(_TAIL_REF_PREFIX, thickness, size_text=_TAIL_REF_PREFIX + tail)
+    changed = np.flatnonzero((full != prefix).any(axis=0))
+    if not changed.size or prefix[:, changed[0]:].any():
+        return None
+    cut = changed[0]
+    return full[:, cut:].astype(np.uint16)[..., None], -height - _TEXT_PAD, cut - _TEXT_PAD
+
+
+def _blend_mask(frame, mask, white: bool) -> None:
+    """Blend black or white through a mask placed relative to _TEXT_ORIGIN."""
+    coverage, top, left = mask
+    top += _TEXT_ORIGIN[1]
+    left += _TEXT_ORIGIN[0]
+    rows, cols = coverage.shape[:2]
+    # Clip to the frame
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + rows, frame.shape[0]), min(left + cols, frame.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return
+    a = coverage[y0 - top:y1 - top, x0 - left:x1 - left]
+    roi = frame[y0:y1, x0:x1]
+    blended = roi * (255 - a)
+    if white:
+        blended += 255 * a
+    roi[...] = ((blended + 127) // 255).astype(np.uint8)
+
+
+def _put_timestamp(frame, text: str) -> None:
+    """Draw the overlay with putText directly."""
+    cv2.putText(frame, text, _TEXT_ORIGIN, _TEXT_FONT, _TEXT_FONT_SCALE, (0, 0, 0), _OUTLINE, cv2.LINE_AA)
+    cv2.putText(frame, text, _TEXT_ORIGIN, _TEXT_FONT, _TEXT_FONT_SCALE, (255, 255, 255), _FILL, cv2.LINE_AA)
+
+
+def _draw_timestamp(frame, ts: datetime) -> None:
+    """Draw "YYYY-MM-DD HH:MM:SS" onto the frame from cached masks."""
+    global _minute_masks
+    minute_text = ts.strftime("%Y-%m-%d %H:%M")
+    seconds_text = ts.strftime(":%S")
+    if seconds_text not in _seconds_masks:
+        masks = {thickness: _tail_mask(seconds_text, thickness) for thickness in (_OUTLINE, _FILL)}
+        _seconds_masks[seconds_text] = None if None in masks.values() else masks
+    seconds = _seconds_masks[seconds_text]
+    if seconds is None:
+        _put_timestamp(frame, minute_text + seconds_text)
+        return
+    if _minute_masks is None or _minute_masks[0] != minute_text:
+        _minute_masks = (minute_text, {thickness: _minute_mask(minute_text, thickness)
+                                       for thickness in (_OUTLINE, _FILL)})
+    minute = _minute_masks[1]
+
+    # Same order as the two putText passes: whole outline first, then fill
+    for thickness, white in ((_OUTLINE, False), (_FILL, True)):
+        _blend_mask(frame, minute[thickness], white)
+        _blend_mask(frame, seconds[thickness], white)
+
 
 def capture_webcam_photo(base_dir: str | None, timestamp: Optional[datetime] = None) -> Optional[CaptureArtifact]:
     """
     Capture a single frame from the default webcam without writing to disk.
     Returns an in-memory artifact or None if capture failed/unavailable.
     """
+    global _cap, _last_capture_at
     if cv2 is None:
         logger.warning("Webcam capture skipped: opencv-python not available")
         return None
 
     ts = timestamp or datetime.now()
 
-    cap = None
     try:
-        cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not cap.isOpened():
-            logger.warning("Webcam capture skipped: device not available")
-            return None
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
-        ret, frame = cap.read()
-        if not ret or frame is None:
-            logger.warning("Webcam capture skipped: read() returned no frame")
-            return None
+        with _cap_lock:
+            now = time.monotonic()
+            frequent = _last_capture_at is not None and now - _last_capture_at < _IDLE_RELEASE_SECONDS
+            _last_capture_at = now
+            if _cap is None:
+                _cap = _open_capture()
+                if _cap is None:
+                    logger.warning("Webcam capture skipped: device not available")
+                    return None
+            else:
+                # Frames buffered while the device sat idle are stale; grab()
+                # skips them without decoding
+                for _ in range(_STALE_FRAMES):
+                    _cap.grab()
+            ret = _cap.grab()
+            frame = _cap.retrieve()[1] if ret else None
+            if not ret or frame is None:
+                # Drop the handle so the next call reopens the device
+                _release_capture()
+                logger.warning("Webcam capture skipped: no frame from device")
+                return None
+            if frequent:
+                _schedule_release()
+            else:
+                # The next shot is likely far off: don't hold the camera until then
+                _cancel_release()
+                _release_capture()
 
         # Overlay timestamp for quick reference
-        overlay = ts.strftime("%Y-%m-%d %H:%M:%S")
         try:
-            cv2.putText(
-                frame,
-                overlay,
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 0, 0),
-                3,
-                cv2.LINE_AA,
-            )
-            cv2.putText(
-                frame,
-                overlay,
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (255, 255, 255),
-                1,
-                cv2.LINE_AA,
-            )
+            _draw_timestamp(frame, ts)
         except Exception:
             pass  # timestamp overlay failure isn't fatal
 
-        success, encoded = cv2.imencode(".jpg", frame)
+        success, encoded = cv2.imencode(".jpg", frame, _JPEG_PARAMS)
         if not success:
             logger.warning("Webcam capture skipped: encoding failed")
             return None
@@ -70,10 +233,5 @@ def capture_webcam_photo(base_dir: str | None, timestamp: Optional[datetime] = N
         return CaptureArtifact(filename=filename, data=encoded.tobytes(), mimetype="image/jpeg")
     except Exception as exc:  # pragma: no cover
         logger.error("Webcam capture failed: %s", exc, exc_info=True)
+        close_webcam()
         return None
-    finally:
-        if cap is not None:
-            try:
-                cap.release()
-            except Exception:
-                pass
\ No newline at end of file
@@ -2,30 +2,219 @@
 Windows Toast Notifications utility
 Shows native Windows 10/11 toast notifications
 """
+import atexit
 import logging
+import queue
+import threading
+import time
+from pathlib import Path
+
+from config import APP_NAME, TOAST_APP_ID
 
 logger = logging.getLogger(__name__)
 
-# Try to use win10toast library (simpler)
+# Prefer native WinRT toasts, then win10toast, then a tray balloon
 TOAST_AVAILABLE = False
+USE_WINRT = False
 USE_WIN10TOAST = False
 USE_WIN32 = False
 
+# All are imported so a later method can stand in when an earlier one can't be used
+try:
+    from winsdk.windows.ui.notifications import ToastNotificationManager, ToastNotification
+    from winsdk.windows.data.xml.dom import XmlDocument
+    USE_WINRT = True
+except ImportError:
+    logger.debug("winsdk not available, trying win10toast")
 try:
     from win10toast import ToastNotifier
-    TOAST_AVAILABLE = True
     USE_WIN10TOAST = True
 except ImportError:
     logger.debug("win10toast not available, trying alternative method")
-    # Fallback to Windows Toast Notification API
+try:
+    import win32api
+    import win32con
+    import win32gui
+    USE_WIN32 = True
+except ImportError:
+    pass
+TOAST_AVAILABLE = USE_WINRT or USE_WIN10TOAST or USE_WIN32
+if not TOAST_AVAILABLE:
+    logger.warning("Neither winsdk, win10toast nor win32api available for notifications")
+
+# Windows drops toasts from an AppUserModelID it doesn't know, so TOAST_APP_ID
+# is registered under HKCU before the first native toast. If that fails, toasts
+# go through win10toast or the tray balloon instead.
+_toast_app_id_registered = None  # None until registration has been tried
+_TOAST_XML = (
+    '<toast duration="{duration}"><visual><binding template="ToastGeneric">'
+    '<text/><text/></binding></visual></toast>'
+)
+_winrt_notifier = None
+
+# Shared ToastNotifier, created on first use
+_TOASTER = None
+_TOASTER_LOCK = threading.Lock()
+
+# Pending toasts, shown one after another by a single worker thread. When a
+# burst overflows it, the oldest pending toast is dropped.
+_NOTIF_QUEUE = queue.Queue(maxsize=8)
+_notif_worker = None
+
+# Tray icon used for balloon notifications when win10toast isn't installed.
+# Its owner is a message-only window (never sees broadcasts, so the worker
+# needn't pump messages) and the icon is removed once the balloon is over.
+_TRAY_ICON_ID = 1
+_HWND_MESSAGE = -3
+_TRAY_LINGER_SECONDS = 5  # extra time past the requested duration before removal
+_tray_hwnd = None
+_tray_icon_added = False
+_tray_remove_at = None  # time.monotonic() deadline for removing the tray icon
+
+
+def _get_toaster():
+    """Return the shared ToastNotifier, creating it once"""
+    global _TOASTER
+    if _TOASTER is None:
+        with _TOASTER_LOCK:
+            if _TOASTER is None:
+                _TOASTER = ToastNotifier()
+    return _TOASTER
+
+
+def _register_toast_app_id() -> bool:
+    """Register TOAST_APP_ID for the current user so its toasts are shown"""
+    try:
+        import winreg  # type: ignore
+    except Exception:
+        return False
     try:
-        import win32api
-        import win32con
-        import win32gui
-        TOAST_AVAILABLE = True
-        USE_WIN32 = True
-    except ImportError:
-        logger.warning("Neither win10toast nor win32api available for notifications")
+        key_path = rf"Software\Classes\AppUserModelId\{TOAST_APP_ID}"
+        with winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path) as key:
+            winreg.SetValueEx(key, "DisplayName", 0, winreg.REG_SZ, APP_NAME)
+        return True
+    except Exception as e:
+        logger.debug(f"Could not register toast AppUserModelID {TOAST_APP_ID}: {e}")
+        return False
+
+
+def _can_show_winrt_toast() -> bool:
+    """Whether native toasts can be used, registering the app ID on first call"""
+    global _toast_app_id_registered
+    if not USE_WINRT:
+        return False
+    if _toast_app_id_registered is None:
+        _toast_app_id_registered = _register_toast_app_id()
+    return _toast_app_id_registered
+
+
+def _show_winrt_toast(title: str, msg: str, duration: int, icon_path: str = None):
+    """Show a native toast through ToastNotificationManager"""
+    global _winrt_notifier
+    if _winrt_notifier is None:
+        _winrt_notifier = ToastNotificationManager.create_toast_notifier(TOAST_APP_ID)
+    doc = XmlDocument()
+    # Windows offers two toast lengths: "short" (~7 s) and "long" (~25 s)
+    doc.load_xml(_TOAST_XML.format(duration="long" if duration > 7 else "short"))
+    # Text nodes are escaped by the DOM, so titles and messages need no quoting
+    text_nodes = doc.get_elements_by_tag_name("text")
+    text_nodes.item(0).append_child(doc.create_text_node(title))
+    text_nodes.item(1).append_child(doc.create_text_node(msg))
+    if icon_path:
+        image = doc.create_element("image")
+        image.set_attribute("placement", "appLogoOverride")
+        image.set_attribute("src", Path(icon_path).resolve().as_uri())
+        doc.get_elements_by_tag_name("binding").item(0).append_child(image)
+    _winrt_notifier.show(ToastNotification(doc))
+
+
+def _show_balloon(title: str, msg: str, duration: int, icon_path: str = None):
+    """Show a tray balloon via Shell_NotifyIcon; the shell handles display timing"""
+    global _tray_hwnd, _tray_icon_added, _tray_remove_at
+    hicon = None
+    if icon_path:
+        try:
+            hicon = win32gui.LoadImage(0, icon_path, win32con.IMAGE_ICON, 0, 0,
+                                       win32con.LR_LOADFROMFILE | win32con.LR_DEFAULTSIZE)
+        except Exception:
+            hicon = None
+    if not hicon:
+        hicon = win32gui.LoadIcon(0, win32con.IDI_APPLICATION)
+    
+    if _tray_hwnd is None:
+        _tray_hwnd = win32gui.CreateWindow("STATIC", "", 0, 0, 0, 0, 0, _HWND_MESSAGE, 0,
+                                           win32api.GetModuleHandle(None), None)
+        atexit.register(_remove_tray_icon)
+    action = win32gui.NIM_MODIFY if _tray_icon_added else win32gui.NIM_ADD
+    nid = (
+        _tray_hwnd, _TRAY_ICON_ID,
+        win32gui.NIF_ICON | win32gui.NIF_TIP | win32gui.NIF_INFO,
+        0, hicon, title[:127],
+        msg[:255], duration * 1000, title[:63], win32gui.NIIF_INFO,
+    )
+    win32gui.Shell_NotifyIcon(action, nid)
+    _tray_icon_added = True
+    _tray_remove_at = time.monotonic() + duration + _TRAY_LINGER_SECONDS
+
+
+def _remove_tray_icon():
+    global _tray_icon_added, _tray_remove_at
+    _tray_remove_at = None
+    if not _tray_icon_added:
+        return
+    _tray_icon_added = False
+    try:
+        win32gui.Shell_NotifyIcon(win32gui.NIM_DELETE, (_tray_hwnd, _TRAY_ICON_ID))
+    except Exception:
+        pass
+
+
+def _notification_worker():
+    """Show queued toasts one at a time"""
+    while True:
+        if _tray_remove_at is None:
+            item = _NOTIF_QUEUE.get()
+        else:
+            # A balloon is up: wait for the next toast only until it's over
+            try:
+                item = _NOTIF_QUEUE.get(timeout=max(0.0, _tray_remove_at - time.monotonic()))
+            except queue.Empty:
+                _remove_tray_icon()
+                continue
+        try:
+            if _can_show_winrt_toast():
+                _show_winrt_toast(**item)
+            elif USE_WIN10TOAST:
+                _get_toaster().show_toast(threaded=False, **item)
+            elif USE_WIN32:
+                _show_balloon(**item)
+            else:
+                continue
+            logger.debug(f"Shown toast notification: {item['title']} - {item['msg']}")
+        except Exception as e:
+            logger.debug(f"Notification failed: {e}")
+
+
+def _enqueue_toast(item: dict):
+    """Queue a toast for the worker, starting it on first use"""
+    global _notif_worker
+    if _notif_worker is None:
+        with _TOASTER_LOCK:
+            if _notif_worker is None:
+                _notif_worker = threading.Thread(target=_notification_worker, daemon=True)
+                _notif_worker.start()
+    try:
+        _NOTIF_QUEUE.put_nowait(item)
+    except queue.Full:
+        # Drop the oldest pending toast to make room for the newest
+        try:
+            _NOTIF_QUEUE.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            _NOTIF_QUEUE.put_nowait(item)
+        except queue.Full:
+            logger.debug(f"Notification queue full, dropped: {item['title']}")
 
 def show_notification(title: str, message: str, duration: int = 5, icon_path: str = None):
     """
@@ -37,53 +226,28 @@ def show_notification(title: str, message: str, duration: int = 5, icon_path: st
         duration: Duration in seconds (default 5)
         icon_path: Path to icon file (optional)
     """
-    try:
-        if not TOAST_AVAILABLE:
-            logger.warning("Toast notifications not available")
-            return False
-        
-        # Method 1: Use win10toast (simpler and better - native toast)
-        if USE_WIN10TOAST:
-            try:
-                from win10toast import ToastNotifier
-                toaster = ToastNotifier()
-                toaster.show_toast(
-                    title=title,
-                    msg=message,
-                    duration=duration,
-                    icon_path=icon_path,
-                    threaded=True
-                )
-                logger.debug(f"Shown toast notification: {title} - {message}")
-                return True
-            except Exception as e:
-                logger.debug(f"win10toast failed: {e}, trying alternative")
-        
-        # Method 2: Use Windows API directly (fallback - shows MessageBox)
-        if USE_WIN32:
-            try:
-                import win32api
-                import win32con
-                
-                # Create a simple notification using MessageBox (fallback)
-                # This is not a toast but a simple notification
-                win32api.MessageBox(
-                    0,
-                    message,
-                    title,
-                    win32con.MB_OK | win32con.MB_ICONINFORMATION
-                )
-                logger.debug(f"Shown notification (MessageBox): {title} - {message}")
-                return True
-            except Exception as e:
-                logger.error(f"Windows API notification failed: {e}")
-                return False
-        
-        return False
-            
-    except Exception as e:
-        logger.error(f"Error showing notification: {e}")
+    if not TOAST_AVAILABLE:
+        logger.warning("Toast notifications not available")
         return False
+    
+    # Method 1: Native WinRT toast, or win10toast if winsdk isn't installed
+    if USE_WINRT or USE_WIN10TOAST:
+        try:
+            _enqueue_toast(dict(title=title, msg=message, duration=duration, icon_path=icon_path))
+            return True
+        except Exception as e:
+            logger.debug(f"Toast failed: {e}, trying alternative")
+    
+    # Method 2: Use Windows API directly (fallback - tray balloon, non-blocking)
+    if USE_WIN32:
+        try:
+            _enqueue_toast(dict(title=title, msg=message, duration=duration, icon_path=icon_path))
+            return True
+        except Exception as e:
+            logger.error(f"Windows API notification failed: {e}")
+            return False
+    
+    return False
 
 def show_teams_notification(sender: str, message: str, duration: int = 5):
     """
@@ -1,19 +1,22 @@
+import atexit
+import logging
+import sys
 import threading
-import win32con
-import win32gui
-import win32api
-import win32event
-import win32ts
-import ctypes
+import time
+
+# pywin32 modules, imported when the first hook is created (see _load_win32)
+win32con = win32gui = win32api = win32event = win32ts = None
+_DefWindowProc = None  # win32gui.DefWindowProc, bound once loaded
 
 # Import logger with safe fallback
 try:
     from utils.logger import logger
 except Exception:
-    import logging
     logger = logging.getLogger("WinEventHook")
     logger.addHandler(logging.NullHandler())
 
+_INFO = logging.INFO
+
 WM_WTSSESSION_CHANGE = 0x02B1
 WM_POWERBROADCAST = 0x218
 WM_QUERYENDSESSION = 0x11
@@ -22,77 +25,174 @@ WTS_SESSION_UNLOCK = 0x8
 PBT_APMSUSPEND = 0x4
 PBT_APMRESUMEAUTOMATIC = 0x12
 
+# Repeats of the same session/power event within this window are ignored
+# (lock/unlock pairs across RDP or user switching, repeated resume notices)
+DEBOUNCE_SECONDS = 0.25
+# How long WM_QUERYENDSESSION waits for on_shutdown before allowing shutdown
+SHUTDOWN_WAIT_SECONDS = 4.5
+
+
+_CLASS_NAME = "WinEventHookListener"
+# The listener window class is registered once per process and shared by all
+# hooks; each hook subclasses its own window with its wnd_proc
+_CLASS_ATOM = None
+_CLASS_LOCK = threading.Lock()
+
+
+def _load_win32():
+    global win32con, win32gui, win32api, win32event, win32ts, _DefWindowProc
+    if win32gui is None:
+        import win32con, win32gui, win32api, win32event, win32ts
+        _DefWindowProc = win32gui.DefWindowProc
+
+
+def _noop():
+    pass
+
+
+def _default_wnd_proc(hwnd, msg, wparam, lparam):
+    return _DefWindowProc(hwnd, msg, wparam, lparam)
+
+
+def _ensure_window_class(hinst):
+    global _CLASS_ATOM
+    with _CLASS_LOCK:
+        if _CLASS_ATOM is None:
+            wc = win32gui.WNDCLASS()
+            wc.hInstance = hinst
+            wc.lpszClassName = _CLASS_NAME
+            wc.lpfnWndProc = _default_wnd_proc
+            # The window is never shown: no background brush or cursor, and
+            # no close item. It stays a hidden top-level window rather than a
+            # message-only (HWND_MESSAGE) one, since message-only windows
+            # don't receive the WM_POWERBROADCAST/WM_QUERYENDSESSION broadcasts.
+            wc.style = win32con.CS_NOCLOSE
+            wc.hbrBackground = 0
+            wc.hCursor = 0
+            _CLASS_ATOM = win32gui.RegisterClass(wc)
+            atexit.register(_unregister_window_class, hinst)
+
+
+def _unregister_window_class(hinst):
+    try:
+        win32gui.UnregisterClass(_CLASS_NAME, hinst)
+    except Exception:
+        pass  # a window may still exist at teardown
+
 
 class WinEventHook:
     def __init__(self, on_lock, on_unlock, on_sleep, on_wake, on_shutdown):
-        self.on_lock = on_lock
-        self.on_unlock = on_unlock
-        self.on_sleep = on_sleep
-        self.on_wake = on_wake
-        self.on_shutdown = on_shutdown
+        if not sys.platform.startswith("win"):
+            raise RuntimeError("WinEventHook is only available on Windows")
+        _load_win32()
+        # Missing callbacks become no-ops so dispatch never checks for None
+        self.on_lock = on_lock or _noop
+        self.on_unlock = on_unlock or _noop
+        self.on_sleep = on_sleep or _noop
+        self.on_wake = on_wake or _noop
+        self.on_shutdown = on_shutdown or _noop
+        self._thread_id = None
+        self._last_fired = {}  # (msg, wparam) -> time.monotonic() of last callback
+        # Message -> handler, and wparam -> (log message, callback) per event kind
+        self._handlers = {
+            WM_WTSSESSION_CHANGE: self._on_session_change,
+            WM_POWERBROADCAST: self._on_power_broadcast,
+            WM_QUERYENDSESSION: self._on_query_end_session,
+        }
+        self._session_events = {
+            WTS_SESSION_LOCK: ("System locked — switched to Break Mode", self.on_lock),
+            WTS_SESSION_UNLOCK: ("System unlocked/resumed — showing break status UI", self.on_unlock),
+        }
+        self._power_events = {
+            PBT_APMSUSPEND: ("System sleep/hibernate — switched to Break Mode", self.on_sleep),
+            PBT_APMRESUMEAUTOMATIC: ("System resumed from sleep/hibernate — showing break status UI", self.on_wake),
+        }
         self.thread = threading.Thread(target=self._msg_loop, daemon=True)
         self.thread.start()
 
+    def stop(self):
+        """Ask the listener thread to exit its message loop."""
+        if self._thread_id is not None:
+            win32api.PostThreadMessage(self._thread_id, win32con.WM_QUIT, 0, 0)
+
     def _msg_loop(self):
-        wc = win32gui.WNDCLASS()
-        hinst = wc.hInstance = win32api.GetModuleHandle(None)
-        wc.lpszClassName = "WinEventHookListener"
-        wc.lpfnWndProc = self._wnd_proc
-        class_atom = win32gui.RegisterClass(wc)
-        hwnd = win32gui.CreateWindow(wc.lpszClassName, "", 0, 0, 0, 0, 0, 0, 0, hinst, None)
+        self._thread_id = win32api.GetCurrentThreadId()
+        hinst = win32api.GetModuleHandle(None)
+        _ensure_window_class(hinst)
+        hwnd = win32gui.CreateWindow(_CLASS_NAME, "", 0, 0, 0, 0, 0, 0, 0, hinst, None)
+        win32gui.SetWindowLong(hwnd, win32con.GWL_WNDPROC, self._make_wnd_proc())
 
         # Register for session notifications
         win32ts.WTSRegisterSessionNotification(hwnd, win32ts.NOTIFY_FOR_THIS_SESSION)
 
-        # Message loop
-        while True:
-            bRet, msg = win32gui.GetMessage(hwnd, 0, 0)
-            if bRet == 0:
-                break  # WM_QUIT
-            elif bRet == -1:
-                continue  # error
-            win32gui.TranslateMessage(msg)
-            win32gui.DispatchMessage(msg)
+        self._pump_messages(hwnd)
 
         win32ts.WTSUnRegisterSessionNotification(hwnd)
 
-    def _wnd_proc(self, hwnd, msg, wparam, lparam):
-        if msg == WM_WTSSESSION_CHANGE:
-            if wparam == WTS_SESSION_LOCK:
-                try:
-                    logger.info("System locked — switched to Break Mode")
-                except Exception:
-                    pass  # Silently fail if logger is not available
-                if self.on_lock:
-                    self.on_lock()
-            elif wparam == WTS_SESSION_UNLOCK:
-                try:
-                    logger.info("System unlocked/resumed — showing break status UI")
-                except Exception:
-                    pass  # Silently fail if logger is not available
-                if self.on_unlock:
-                    self.on_unlock()
-        elif msg == WM_POWERBROADCAST:
-            if wparam == PBT_APMSUSPEND:
-                try:
-                    logger.info("System sleep/hibernate — switched to Break Mode")
-                except Exception:
-                    pass  # Silently fail if logger is not available
-                if self.on_sleep:
-                    self.on_sleep()
-            elif wparam == PBT_APMRESUMEAUTOMATIC:
+    def _pump_messages(self, hwnd):
+        """Sleep until input arrives, then drain the whole queue; returns on WM_QUIT."""
+        peek_message, dispatch_message = win32gui.PeekMessage, win32gui.DispatchMessage
+        pm_remove, wm_quit = win32con.PM_REMOVE, win32con.WM_QUIT
+        while True:
+            win32event.MsgWaitForMultipleObjectsEx(
+                [], win32event.INFINITE, win32event.QS_ALLINPUT, win32event.MWMO_INPUTAVAILABLE
+            )
+            # No hwnd filter, so thread messages (stop()'s WM_QUIT) are seen too;
+            # messages for our window still reach its wnd_proc via msg.hwnd
+            while True:
+                rc, msg = peek_message(None, 0, 0, pm_remove)
+                if not rc:
+                    break
+                if msg[1] == wm_quit:
+                    return
+                # No keyboard input reaches this hidden window, so there is
+                # nothing for TranslateMessage to do
+                dispatch_message(msg)
+
+    def _make_wnd_proc(self):
+        """Build the window procedure with the handler table bound as a local."""
+        get_handler = self._handlers.get
+        def_window_proc = _DefWindowProc
+
+        def wnd_proc(hwnd, msg, wparam, lparam):
+            handler = get_handler(msg)
+            if handler is not None:
+                # Keep a failing callback from propagating into the message pump
                 try:
-                    logger.info("System resumed from sleep/hibernate — showing break status UI")
+                    result = handler(wparam)
                 except Exception:
-                    pass  # Silently fail if logger is not available
-                if self.on_wake:
-                    self.on_wake()
-        elif msg == WM_QUERYENDSESSION:
-            try:
-                logger.info("System shutting down — auto Clock Out completed")
-            except Exception:
-                pass  # Silently fail if logger is not available
-            if self.on_shutdown:
-                self.on_shutdown()
-            return 1  # allow shutdown
-        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+                    logger.exception("WinEventHook handler failed")
+                    result = None
+                if result is not None:
+                    return result
+            return def_window_proc(hwnd, msg, wparam, lparam)
+
+        return wnd_proc
+
+    def _fire(self, key, event):
+        if event is None:
+            return
+        now = time.monotonic()
+        if now - self._last_fired.get(key, float("-inf")) < DEBOUNCE_SECONDS:
+            return
+        self._last_fired[key] = now
+        message, callback = event
+        if logger.isEnabledFor(_INFO):
+            logger.info(message)
+        callback()
+
+    def _on_session_change(self, wparam):
+        self._fire((WM_WTSSESSION_CHANGE, wparam), self._session_events.get(wparam))
+
+    def _on_power_broadcast(self, wparam):
+        self._fire((WM_POWERBROADCAST, wparam), self._power_events.get(wparam))
+
+    def _on_query_end_session(self, wparam):
+        if logger.isEnabledFor(_INFO):
+            logger.info("System shutting down — auto Clock Out completed")
+        # Windows only waits a few seconds for this reply, so don't let a slow
+        # clock-out hold it up; the non-daemon thread may keep finishing after
+        worker = threading.Thread(target=self.on_shutdown, name="WinEventHookShutdown")
+        worker.start()
+        worker.join(timeout=SHUTDOWN_WAIT_SECONDS)
+        return 1  # allow shutdown